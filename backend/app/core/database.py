@@ -11,11 +11,25 @@ import os
 # Database URL configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./focusflow.db")
 
+# Connection pool limits (not applied to SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+if "sqlite" in DATABASE_URL:
+    engine_options = {"connect_args": {"check_same_thread": False}}
+else:
+    engine_options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+    }
+    if DATABASE_URL.startswith("postgresql+psycopg://"):
+        # Prepare statements on first use instead of psycopg 3's default of the 5th;
+        # the service's per-request queries all repeat with the same shape
+        engine_options["connect_args"] = {"prepare_threshold": 0}
+
 # Create engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+engine = create_engine(DATABASE_URL, **engine_options)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
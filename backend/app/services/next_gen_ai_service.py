@@ -4,47 +4,190 @@ Implements cutting-edge AI capabilities for productivity optimization
 """
 
 import asyncio
+import hashlib
 import json
+import re
 import time
-from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Any, Optional, Tuple, Union
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
 import numpy as np
-import pandas as pd
-from dataclasses import dataclass, asdict
+import orjson
+from dataclasses import dataclass
 from enum import Enum
+from operator import attrgetter
 import structlog
 
 # AI/ML Imports
 import openai
-from transformers import (
-    AutoTokenizer, AutoModel, pipeline, 
-    BertTokenizer, BertForSequenceClassification
-)
-import torch
+from transformers import pipeline
 import tensorflow as tf
 from sklearn.ensemble import RandomForestRegressor, IsolationForest, GradientBoostingClassifier
-from sklearn.cluster import KMeans, DBSCAN
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
 import joblib
 
 # Data Processing
 import spacy
 from sentence_transformers import SentenceTransformer
 import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.stem import WordNetLemmatizer
+from nltk.tokenize import sent_tokenize
 
 # Database and Redis
-from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.models.models import User, Task, PomodoroSession, TimeEntry, UserAnalytics
+from app.models.models import Task, PomodoroSession, TimeEntry, UserAnalytics
 import redis.asyncio as redis
 
 logger = structlog.get_logger()
 
+# Static recommendation blocks, built once and appended as-is
+LOW_PRODUCTIVITY_RECOMMENDATIONS = (
+    "Your productivity score is predicted to be low. Consider:",
+    "-  Taking a 5-10 minute break before starting",
+    "-  Choosing easier tasks to build momentum",
+    "-  Using the Pomodoro technique with shorter intervals",
+)
+
+HIGH_PRODUCTIVITY_RECOMMENDATIONS = (
+    "High productivity predicted! Perfect time for:",
+    "-  Tackling your most challenging tasks",
+    "-  Deep focus work without interruptions",
+    "-  Learning new skills or complex problem-solving",
+)
+
+SLEEP_RECOMMENDATIONS = (
+    "Sleep quality significantly impacts your productivity",
+    "-  Aim for 7-9 hours of quality sleep",
+    "-  Consider a consistent bedtime routine",
+)
+
+STRESS_RECOMMENDATIONS = (
+    "Stress levels are affecting your performance",
+    "-  Try 5-minute meditation before work sessions",
+    "-  Use breathing exercises during breaks",
+)
+
+# Keyword tables for task text analysis, shared by all service instances
+TECHNICAL_TERMS = ("algorithm", "implementation", "architecture", "framework", "optimization", "integration")
+COMPLEXITY_KEYWORDS = ("complex", "advanced", "comprehensive", "detailed", "thorough", "extensive")
+UNCERTAINTY_INDICATORS = ("might", "could", "possibly", "perhaps", "unclear", "investigate")
+ACTION_VERBS = ("analyze", "design", "implement", "optimize", "integrate", "develop", "create")
+DURATION_COMPLEXITY_WORDS = ("complex", "advanced", "difficult", "challenging")
+PLANNING_WORDS = ("plan", "research", "analyze", "design")
+VERIFICATION_WORDS = ("test", "review", "validate", "check")
+TIME_PRESSURE_WORDS = ("urgent", "asap", "quickly", "fast")
+UNFAMILIARITY_WORDS = ("complex", "advanced", "new", "unfamiliar")
+COORDINATION_WORDS = ("integrate", "connect", "coordinate", "collaborate")
+SCOPE_EXPANSION_WORDS = ("improve", "enhance", "optimize", "also", "additionally")
+
+# GPT prompt templates, defined once without the source indentation (which
+# would otherwise be sent, and billed, as prompt tokens on every request)
+RECOMMENDATION_PROMPT_TEMPLATE = """\
+Based on a predicted productivity score of {predicted_score:.2f} (0-1 scale),
+provide 3 specific, actionable recommendations for optimizing work performance.
+
+Focus on:
+- Immediate actions they can take
+- Environment optimization
+- Energy management
+
+Format as bullet points. Be concise and practical.
+"""
+
+SUBTASK_PROMPT_TEMPLATE = """\
+Break down the following task into 3-7 actionable subtasks:
+
+Task: {task_description}
+
+Complexity Level: {complexity_score:.2f} (0=simple, 1=very complex)
+
+For each subtask, provide:
+1. Clear, actionable description
+2. Estimated duration in minutes (15-60 range)
+3. Priority level (low, medium, high)
+4. Required skills/tools
+
+Format as JSON array with objects containing: title, description, estimated_duration, priority, skills_required
+"""
+
+# Used when the model's reply is not valid JSON and is parsed line by line
+NUMBERED_LINE_PREFIXES = ("1.", "2.", "3.", "4.", "5.", "6.", "7.")
+DURATION_PATTERN = re.compile(r'(\d+)')
+
+# Feature importance reported with every ensemble prediction (simplified for demonstration)
+FEATURE_IMPORTANCE = {
+    "time_of_day": 0.25,
+    "historical_performance": 0.30,
+    "sleep_quality": 0.15,
+    "stress_level": 0.20,
+    "workload": 0.10
+}
+
+# Difficulty offset applied per subtask priority; unknown priorities get no offset
+PRIORITY_DIFFICULTY_ADJUSTMENT = {"high": 0.1, "low": -0.1}
+
+# Rule-based score adjustment per hour of day (index = hour)
+HOUR_PRODUCTIVITY_ADJUSTMENT = (
+    -0.2, -0.2, -0.2, -0.2, -0.2, -0.2, -0.2, -0.2,  # 00-07: before the workday
+    0.1, 0.2, 0.2, 0.1,                              # 08-11: morning peak
+    0.0,                                             # 12: lunch
+    0.1, 0.2, 0.2, 0.1,                              # 13-16: afternoon peak
+    0.0, 0.0,                                        # 17-18: winding down
+    -0.2, -0.2, -0.2, -0.2, -0.2,                    # 19-23: evening
+)
+
+# Rule-based score adjustment per weekday (index = datetime.weekday())
+DAY_OF_WEEK_ADJUSTMENT = (0.1, 0.1, 0.1, 0.1, -0.05, -0.15, -0.15)  # Mon-Thu, Fri, weekend
+
+# Placeholder schedule returned until per-user schedule optimization exists
+DEFAULT_SCHEDULE = {
+    "recommended_start_time": "09:00",
+    "peak_focus_periods": ("09:00-11:00", "14:00-16:00"),
+    "suggested_break_intervals": 25,
+    "optimal_task_sequence": "high_priority_first"
+}
+
+# Generic plan used when GPT subtask generation fails
+FALLBACK_SUBTASKS = (
+    {
+        "title": "Plan and research",
+        "description": "Gather requirements and plan approach",
+        "estimated_duration": 30,
+        "priority": "high",
+        "skills_required": ("research", "planning")
+    },
+    {
+        "title": "Implement solution",
+        "description": "Execute the main task",
+        "estimated_duration": 60,
+        "priority": "high",
+        "skills_required": ("implementation",)
+    },
+    {
+        "title": "Review and test",
+        "description": "Validate and test the results",
+        "estimated_duration": 25,
+        "priority": "medium",
+        "skills_required": ("testing", "review")
+    }
+)
+
+# Task columns loaded for feature extraction, in the order _task_to_dict emits them
+TASK_DICT_FIELDS = ("id", "title", "status", "priority", "completed_pomodoros", "estimated_pomodoros")
+_get_task_fields = attrgetter(*TASK_DICT_FIELDS)
+
+def _json_default(value: Any) -> Any:
+    """orjson fallback for the few non-native types that can appear in AI results"""
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def _stable_digest(value: Any) -> str:
+    """Process-independent digest of a cache input (built-in hash() is salted per process)"""
+    payload = json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
 class AIModelType(Enum):
     PRODUCTIVITY_PREDICTOR = "productivity_predictor"
     TASK_PRIORITIZER = "task_prioritizer"
@@ -79,6 +222,11 @@ class ProductivityPrediction:
     optimal_schedule: Dict[str, Any]
     risk_factors: List[str]
 
+    @classmethod
+    def from_cache(cls, data: Dict[str, Any]) -> "ProductivityPrediction":
+        """Rebuild a prediction from its cached JSON form"""
+        return cls(**{**data, "confidence": PredictionConfidence(data["confidence"])})
+
 @dataclass
 class TaskBreakdown:
     subtasks: List[Dict[str, Any]]
@@ -89,9 +237,10 @@ class TaskBreakdown:
     risk_assessment: Dict[str, Any]
 
 class NextGenAIService:
-    def __init__(self, redis_url: str, openai_api_key: str):
-        self.redis = redis.from_url(redis_url)
-        self.openai_client = openai.OpenAI(api_key=openai_api_key)
+    def __init__(self, redis_url: str, openai_api_key: str, redis_max_connections: int = 32):
+        # Sized pool so concurrent requests don't queue behind a few sockets
+        self.redis = redis.from_url(redis_url, max_connections=redis_max_connections)
+        self.openai_client = openai.AsyncOpenAI(api_key=openai_api_key)
         
         # Initialize models
         self.models = {}
@@ -130,8 +279,19 @@ class NextGenAIService:
         self.nlp_pipeline = None
         
         # Cache for AI responses
-        self.response_cache = {}
+        self.response_cache = OrderedDict()  # key -> (expires_at, encoded payload), in LRU order
+        self.response_cache_size = 1024
+        self.local_cache_ttl = 60  # seconds an entry is served without Redis
         self.cache_ttl = 3600  # 1 hour
+        self.user_data_cache_ttl = 120  # 2 minutes for raw per-user history
+        self._background_tasks = set()  # strong refs to in-flight cache writes
+        
+        # Circuit breaker: stop calling Redis for a while after repeated failures
+        self.cache_failure_threshold = 5
+        self.cache_retry_after = 30  # seconds
+        self._cache_failures = 0
+        self._cache_circuit_open = False
+        self._cache_bypass_until = 0.0
 
     async def initialize(self):
         """Initialize all AI models and services"""
@@ -256,34 +416,36 @@ class NextGenAIService:
 
     async def advanced_productivity_prediction(self, user_id: str, context: Dict[str, Any]) -> ProductivityPrediction:
         """Advanced productivity prediction using ensemble methods"""
-        cache_key = f"productivity_prediction:{user_id}:{hash(str(context))}"
+        # Single reference time for the whole prediction
+        now = datetime.now()
+        # Predictions depend on the local hour of day, so key them on that hour as well
+        # as the context; a cached score never outlives the hour it was made for
+        time_bucket = now.strftime("%Y%m%d%H")
+        cache_key = f"productivity_prediction:{user_id}:{time_bucket}:{_stable_digest(context)}"
         
         # Check cache
         cached_result = await self._get_from_cache(cache_key)
         if cached_result:
-            return ProductivityPrediction(**cached_result)
+            return ProductivityPrediction.from_cache(cached_result)
         
         try:
             # Gather comprehensive user data
-            user_data = await self._gather_user_productivity_data(user_id)
+            user_data = await self._gather_user_productivity_data(user_id, now)
             
             # Extract features for prediction
-            features = await self._extract_productivity_features(user_data, context)
+            features = await self._extract_productivity_features(user_data, context, now)
             
             # Ensemble prediction using multiple models
             predictions = await self._ensemble_productivity_prediction(features)
             
-            # Generate personalized recommendations
-            recommendations = await self._generate_productivity_recommendations(
-                user_id, features, predictions
+            # Recommendations (which wait on GPT), schedule and risk factors are
+            # independent of each other, so run them concurrently
+            recommendations, optimal_schedule, risk_factors = await asyncio.gather(
+                self._generate_productivity_recommendations(user_id, features, predictions),
+                self._optimize_user_schedule(user_id, predictions),
+                self._assess_productivity_risks(user_data, predictions)
             )
             
-            # Create optimal schedule
-            optimal_schedule = await self._optimize_user_schedule(user_id, predictions)
-            
-            # Assess risk factors
-            risk_factors = await self._assess_productivity_risks(user_data, predictions)
-            
             # Determine confidence level
             confidence = self._determine_prediction_confidence(predictions)
             
@@ -296,8 +458,8 @@ class NextGenAIService:
                 risk_factors=risk_factors
             )
             
-            # Cache result
-            await self._cache_result(cache_key, asdict(result))
+            # Cache result (orjson serializes the dataclass directly)
+            self._cache_result(cache_key, result)
             
             # Log prediction
             logger.info(
@@ -310,48 +472,74 @@ class NextGenAIService:
             return result
             
         except Exception as e:
-            logger.error(f"Productivity prediction failed for user {user_id}: {str(e)}")
+            logger.error("Productivity prediction failed", user_id=user_id, error=str(e))
             raise
 
-    async def _gather_user_productivity_data(self, user_id: str) -> Dict[str, Any]:
+    async def _gather_user_productivity_data(self, user_id: str, now: datetime) -> Dict[str, Any]:
         """Gather comprehensive productivity data for user"""
+        # History changes slowly; reuse it across predictions with different contexts
+        cache_key = f"productivity_data:{user_id}"
+        cached_data = await self._get_from_cache(cache_key)
+        if cached_data:
+            return cached_data
+        
+        cutoff = now - timedelta(days=30)
+        
         async with get_db() as db:
-            # Get recent sessions
-            recent_sessions = db.query(PomodoroSession).filter(
-                PomodoroSession.user_id == user_id,
-                PomodoroSession.completed_at >= datetime.now() - timedelta(days=30)
-            ).all()
-            
-            # Get tasks
-            recent_tasks = db.query(Task).filter(
-                Task.user_id == user_id,
-                Task.updated_at >= datetime.now() - timedelta(days=30)
-            ).all()
-            
-            # Get time entries
-            time_entries = db.query(TimeEntry).filter(
-                TimeEntry.user_id == user_id,
-                TimeEntry.created_at >= datetime.now() - timedelta(days=30)
-            ).all()
-            
-            # Get analytics
-            analytics = db.query(UserAnalytics).filter(
-                UserAnalytics.user_id == user_id
-            ).first()
+            # The ORM session is synchronous; run the queries on a worker thread
+            user_data = await asyncio.to_thread(self._query_user_productivity_data, db, user_id, cutoff)
+        
+        self._cache_result(cache_key, user_data, ttl=self.user_data_cache_ttl)
+        
+        return user_data
+
+    def _query_user_productivity_data(self, db, user_id: str, cutoff: datetime) -> Dict[str, Any]:
+        """Run the blocking history queries for _gather_user_productivity_data"""
+        # Only the columns read by the *_to_dict converters are loaded, and rows
+        # are streamed in batches instead of materialized as full ORM objects
+        
+        # Get recent sessions
+        recent_sessions = db.query(
+            PomodoroSession.id, PomodoroSession.duration, PomodoroSession.focus_score,
+            PomodoroSession.interrupted, PomodoroSession.completed_at
+        ).filter(
+            PomodoroSession.user_id == user_id,
+            PomodoroSession.completed_at >= cutoff
+        ).yield_per(500)
+        
+        # Get tasks
+        recent_tasks = db.query(
+            *(getattr(Task, field) for field in TASK_DICT_FIELDS)
+        ).filter(
+            Task.user_id == user_id,
+            Task.updated_at >= cutoff
+        ).yield_per(500)
+        
+        # Get time entries
+        recent_time_entries = db.query(
+            TimeEntry.id, TimeEntry.duration, TimeEntry.created_at
+        ).filter(
+            TimeEntry.user_id == user_id,
+            TimeEntry.created_at >= cutoff
+        ).yield_per(500)
+        
+        # Get analytics
+        analytics = db.query(UserAnalytics).filter(
+            UserAnalytics.user_id == user_id
+        ).first()
         
         return {
             "sessions": [self._session_to_dict(s) for s in recent_sessions],
             "tasks": [self._task_to_dict(t) for t in recent_tasks],
-            "time_entries": [self._time_entry_to_dict(te) for te in time_entries],
+            "time_entries": [self._time_entry_to_dict(te) for te in recent_time_entries],
             "analytics": self._analytics_to_dict(analytics) if analytics else {}
         }
 
-    async def _extract_productivity_features(self, user_data: Dict[str, Any], context: Dict[str, Any]) -> np.ndarray:
+    async def _extract_productivity_features(self, user_data: Dict[str, Any], context: Dict[str, Any], current_time: datetime) -> np.ndarray:
         """Extract features for productivity prediction"""
         features = []
         
         # Time-based features
-        current_time = datetime.now()
         features.extend([
             current_time.hour,  # Hour of day
             current_time.weekday(),  # Day of week
@@ -361,22 +549,37 @@ class NextGenAIService:
         # Historical productivity features
         sessions = user_data.get("sessions", [])
         if sessions:
-            focus_scores = [s.get("focus_score", 0.5) for s in sessions]
+            # Pack the per-session fields into parallel arrays once for the reductions
+            session_count = len(sessions)
+            focus_scores = np.fromiter((s.get("focus_score", 0.5) for s in sessions), dtype=float, count=session_count)
+            interrupted = np.fromiter((bool(s.get("interrupted", False)) for s in sessions), dtype=bool, count=session_count)
             features.extend([
-                np.mean(focus_scores),  # Average focus score
-                np.std(focus_scores),   # Focus score variability
-                len([s for s in sessions if s.get("interrupted", False)]) / len(sessions),  # Interruption rate
+                focus_scores.mean(),  # Average focus score
+                focus_scores.std(),   # Focus score variability
+                interrupted.mean(),   # Interruption rate
             ])
         else:
             features.extend([0.5, 0.2, 0.3])  # Default values
         
-        # Task completion features
+        # Tally every task-derived feature in a single pass over the tasks
         tasks = user_data.get("tasks", [])
+        completed_count = pending_count = high_priority_count = 0
+        total_pomodoros = 0
+        for t in tasks:
+            status = t.get("status")
+            if status == "completed":
+                completed_count += 1
+            elif status == "pending":
+                pending_count += 1
+            if t.get("priority") in ("high", "critical"):
+                high_priority_count += 1
+            total_pomodoros += t.get("completed_pomodoros", 0)
+        
+        # Task completion features
         if tasks:
-            completed_tasks = [t for t in tasks if t.get("status") == "completed"]
             features.extend([
-                len(completed_tasks) / len(tasks),  # Completion rate
-                np.mean([t.get("completed_pomodoros", 0) for t in tasks]),  # Avg pomodoros per task
+                completed_count / len(tasks),  # Completion rate
+                total_pomodoros / len(tasks),  # Avg pomodoros per task
             ])
         else:
             features.extend([0.7, 2.5])  # Default values
@@ -391,8 +594,8 @@ class NextGenAIService:
         
         # Workload features
         features.extend([
-            len([t for t in tasks if t.get("status") == "pending"]),  # Pending tasks count
-            len([t for t in tasks if t.get("priority") in ["high", "critical"]]),  # High priority tasks
+            pending_count,  # Pending tasks count
+            high_priority_count,  # High priority tasks
         ])
         
         # Social/calendar features
@@ -429,15 +632,17 @@ class NextGenAIService:
                 predictions["random_forest"] = max(0, min(1, rf_pred))
                 weights["random_forest"] = 0.3
             except Exception as e:
-                logger.warning(f"Random Forest prediction failed: {str(e)}")
+                logger.warning("Random Forest prediction failed", error=str(e))
         
         # Neural Network prediction
         try:
-            nn_pred = self.productivity_nn.predict(features, verbose=0)[0][0]
+            # Keras inference is blocking; keep it off the event loop
+            nn_output = await asyncio.to_thread(self.productivity_nn.predict, features, verbose=0)
+            nn_pred = nn_output[0][0]
             predictions["neural_network"] = max(0, min(1, float(nn_pred)))
             weights["neural_network"] = 0.4
         except Exception as e:
-            logger.warning(f"Neural Network prediction failed: {str(e)}")
+            logger.warning("Neural Network prediction failed", error=str(e))
         
         # LSTM prediction (if historical data available)
         try:
@@ -447,7 +652,7 @@ class NextGenAIService:
             predictions["lstm"] = lstm_pred
             weights["lstm"] = 0.2
         except Exception as e:
-            logger.warning(f"LSTM prediction failed: {str(e)}")
+            logger.warning("LSTM prediction failed", error=str(e))
         
         # Rule-based prediction as fallback
         rule_based_pred = self._rule_based_productivity_prediction(features)
@@ -462,20 +667,11 @@ class NextGenAIService:
         else:
             weighted_average = 0.5
         
-        # Feature importance (simplified for demonstration)
-        feature_importance = {
-            "time_of_day": 0.25,
-            "historical_performance": 0.30,
-            "sleep_quality": 0.15,
-            "stress_level": 0.20,
-            "workload": 0.10
-        }
-        
         return {
             "individual_predictions": predictions,
             "weights": weights,
             "weighted_average": weighted_average,
-            "feature_importance": feature_importance,
+            "feature_importance": dict(FEATURE_IMPORTANCE),
             "model_confidence": len(predictions) / 4  # Confidence based on number of successful predictions
         }
 
@@ -488,21 +684,11 @@ class NextGenAIService:
         productivity_score = 0.5
         
         # Peak hours (9-11 AM, 2-4 PM)
-        if hour in [9, 10, 14, 15]:
-            productivity_score += 0.2
-        elif hour in [8, 11, 13, 16]:
-            productivity_score += 0.1
-        elif hour < 8 or hour > 18:
-            productivity_score -= 0.2
+        productivity_score += HOUR_PRODUCTIVITY_ADJUSTMENT[hour] if 0 <= hour < 24 else -0.2
         
         # Day of week adjustment
         day_of_week = int(feature_vector[1])
-        if day_of_week in [0, 1, 2, 3]:  # Monday-Thursday
-            productivity_score += 0.1
-        elif day_of_week == 4:  # Friday
-            productivity_score -= 0.05
-        else:  # Weekend
-            productivity_score -= 0.15
+        productivity_score += DAY_OF_WEEK_ADJUSTMENT[day_of_week] if 0 <= day_of_week < 7 else -0.15
         
         # Sleep and stress adjustments
         if len(feature_vector) > 10:
@@ -537,50 +723,26 @@ class NextGenAIService:
         
         # Performance-based recommendations
         if predicted_score < 0.6:
-            recommendations.append("Your productivity score is predicted to be low. Consider:")
-            recommendations.append("-  Taking a 5-10 minute break before starting")
-            recommendations.append("-  Choosing easier tasks to build momentum")
-            recommendations.append("-  Using the Pomodoro technique with shorter intervals")
+            recommendations.extend(LOW_PRODUCTIVITY_RECOMMENDATIONS)
         elif predicted_score > 0.8:
-            recommendations.append("High productivity predicted! Perfect time for:")
-            recommendations.append("-  Tackling your most challenging tasks")
-            recommendations.append("-  Deep focus work without interruptions")
-            recommendations.append("-  Learning new skills or complex problem-solving")
+            recommendations.extend(HIGH_PRODUCTIVITY_RECOMMENDATIONS)
         
         # Feature-specific recommendations
         if feature_importance.get("sleep_quality", 0) > 0.2:
-            recommendations.append("Sleep quality significantly impacts your productivity")
-            recommendations.append("-  Aim for 7-9 hours of quality sleep")
-            recommendations.append("-  Consider a consistent bedtime routine")
+            recommendations.extend(SLEEP_RECOMMENDATIONS)
         
         if feature_importance.get("stress_level", 0) > 0.2:
-            recommendations.append("Stress levels are affecting your performance")
-            recommendations.append("-  Try 5-minute meditation before work sessions")
-            recommendations.append("-  Use breathing exercises during breaks")
+            recommendations.extend(STRESS_RECOMMENDATIONS)
         
-        # AI-generated contextual recommendations
-        try:
-            ai_recommendations = await self._generate_ai_recommendations(user_id, predicted_score)
-            recommendations.extend(ai_recommendations)
-        except Exception as e:
-            logger.warning(f"Failed to generate AI recommendations: {str(e)}")
+        # AI-generated contextual recommendations (returns [] on failure)
+        recommendations.extend(await self._generate_ai_recommendations(user_id, predicted_score))
         
         return recommendations[:8]  # Limit to 8 recommendations
 
     async def _generate_ai_recommendations(self, user_id: str, predicted_score: float) -> List[str]:
         """Generate AI-powered recommendations using GPT"""
         try:
-            prompt = f"""
-            Based on a predicted productivity score of {predicted_score:.2f} (0-1 scale), 
-            provide 3 specific, actionable recommendations for optimizing work performance.
-            
-            Focus on:
-            - Immediate actions they can take
-            - Environment optimization
-            - Energy management
-            
-            Format as bullet points. Be concise and practical.
-            """
+            prompt = RECOMMENDATION_PROMPT_TEMPLATE.format(predicted_score=predicted_score)
             
             response = await self.openai_client.chat.completions.create(
                 model="gpt-4-turbo-preview",
@@ -596,12 +758,13 @@ class NextGenAIService:
             return recommendations[:3]  # Limit to 3 AI recommendations
             
         except Exception as e:
-            logger.error(f"Failed to generate AI recommendations: {str(e)}")
+            logger.error("Failed to generate AI recommendations", error=str(e))
             return []
 
     async def intelligent_task_breakdown(self, task_description: str, user_context: Dict[str, Any]) -> TaskBreakdown:
         """Break down complex tasks using AI and ML techniques"""
-        cache_key = f"task_breakdown:{hash(task_description)}"
+        # Subtask durations and difficulty are personalized, so the user context is part of the key
+        cache_key = f"task_breakdown:{_stable_digest([task_description, user_context])}"
         
         # Check cache
         cached_result = await self._get_from_cache(cache_key)
@@ -639,8 +802,8 @@ class NextGenAIService:
                 risk_assessment=risk_assessment
             )
             
-            # Cache result
-            await self._cache_result(cache_key, asdict(result))
+            # Cache result (orjson serializes the dataclass directly)
+            self._cache_result(cache_key, result)
             
             logger.info(
                 "Intelligent task breakdown completed",
@@ -652,7 +815,7 @@ class NextGenAIService:
             return result
             
         except Exception as e:
-            logger.error(f"Task breakdown failed: {str(e)}")
+            logger.error("Task breakdown failed", error=str(e))
             raise
 
     async def _analyze_task_complexity(self, task_description: str) -> Dict[str, Any]:
@@ -661,40 +824,18 @@ class NextGenAIService:
             # Tokenize and analyze text
             doc = self.nlp(task_description) if self.nlp else None
             
+            text_lower = task_description.lower()
+            
+            # Count indicators
             complexity_indicators = {
                 "word_count": len(task_description.split()),
                 "sentence_count": len(sent_tokenize(task_description)),
-                "technical_terms": 0,
-                "action_verbs": 0,
-                "complexity_keywords": 0,
-                "uncertainty_indicators": 0
+                "technical_terms": sum(term in text_lower for term in TECHNICAL_TERMS),
+                "action_verbs": sum(verb in text_lower for verb in ACTION_VERBS),
+                "complexity_keywords": sum(keyword in text_lower for keyword in COMPLEXITY_KEYWORDS),
+                "uncertainty_indicators": sum(indicator in text_lower for indicator in UNCERTAINTY_INDICATORS)
             }
             
-            # Define complexity keywords
-            technical_terms = ["algorithm", "implementation", "architecture", "framework", "optimization", "integration"]
-            complexity_keywords = ["complex", "advanced", "comprehensive", "detailed", "thorough", "extensive"]
-            uncertainty_indicators = ["might", "could", "possibly", "perhaps", "unclear", "investigate"]
-            action_verbs = ["analyze", "design", "implement", "optimize", "integrate", "develop", "create"]
-            
-            text_lower = task_description.lower()
-            
-            # Count indicators
-            for term in technical_terms:
-                if term in text_lower:
-                    complexity_indicators["technical_terms"] += 1
-            
-            for keyword in complexity_keywords:
-                if keyword in text_lower:
-                    complexity_indicators["complexity_keywords"] += 1
-            
-            for indicator in uncertainty_indicators:
-                if indicator in text_lower:
-                    complexity_indicators["uncertainty_indicators"] += 1
-            
-            for verb in action_verbs:
-                if verb in text_lower:
-                    complexity_indicators["action_verbs"] += 1
-            
             # Calculate complexity score (0-1)
             complexity_score = min(1.0, (
                 complexity_indicators["word_count"] / 100 * 0.2 +
@@ -705,7 +846,10 @@ class NextGenAIService:
             ))
             
             # Sentiment analysis
-            sentiment = self.sentiment_analyzer(task_description)[0] if self.sentiment_analyzer else {"label": "NEUTRAL", "score": 0.5}
+            if self.sentiment_analyzer:
+                sentiment = (await asyncio.to_thread(self.sentiment_analyzer, task_description))[0]
+            else:
+                sentiment = {"label": "NEUTRAL", "score": 0.5}
             
             return {
                 "complexity_score": complexity_score,
@@ -715,7 +859,7 @@ class NextGenAIService:
             }
             
         except Exception as e:
-            logger.error(f"Task complexity analysis failed: {str(e)}")
+            logger.error("Task complexity analysis failed", error=str(e))
             return {
                 "complexity_score": 0.5,
                 "indicators": {},
@@ -728,21 +872,10 @@ class NextGenAIService:
         try:
             complexity_score = complexity_analysis["complexity_score"]
             
-            prompt = f"""
-            Break down the following task into 3-7 actionable subtasks:
-            
-            Task: {task_description}
-            
-            Complexity Level: {complexity_score:.2f} (0=simple, 1=very complex)
-            
-            For each subtask, provide:
-            1. Clear, actionable description
-            2. Estimated duration in minutes (15-60 range)
-            3. Priority level (low, medium, high)
-            4. Required skills/tools
-            
-            Format as JSON array with objects containing: title, description, estimated_duration, priority, skills_required
-            """
+            prompt = SUBTASK_PROMPT_TEMPLATE.format(
+                task_description=task_description,
+                complexity_score=complexity_score
+            )
             
             response = await self.openai_client.chat.completions.create(
                 model="gpt-4-turbo-preview",
@@ -768,8 +901,7 @@ class NextGenAIService:
             
             for line in lines:
                 line = line.strip()
-                if line.startswith('1.') or line.startswith('2.') or line.startswith('3.') or \
-                   line.startswith('4.') or line.startswith('5.') or line.startswith('6.') or line.startswith('7.'):
+                if line.startswith(NUMBERED_LINE_PREFIXES):
                     if current_subtask:
                         subtasks.append(current_subtask)
                     current_subtask = {
@@ -781,8 +913,7 @@ class NextGenAIService:
                     }
                 elif "duration" in line.lower() and current_subtask:
                     # Extract duration
-                    import re
-                    duration_match = re.search(r'(\d+)', line)
+                    duration_match = DURATION_PATTERN.search(line)
                     if duration_match:
                         current_subtask["estimated_duration"] = int(duration_match.group(1))
             
@@ -792,35 +923,17 @@ class NextGenAIService:
             return subtasks[:7]  # Limit to 7 subtasks
             
         except Exception as e:
-            logger.error(f"AI subtask generation failed: {str(e)}")
-            # Fallback subtasks
+            logger.error("AI subtask generation failed", error=str(e))
+            # Fallback subtasks (fresh copies; callers may extend them)
             return [
-                {
-                    "title": "Plan and research",
-                    "description": "Gather requirements and plan approach",
-                    "estimated_duration": 30,
-                    "priority": "high",
-                    "skills_required": ["research", "planning"]
-                },
-                {
-                    "title": "Implement solution",
-                    "description": "Execute the main task",
-                    "estimated_duration": 60,
-                    "priority": "high",
-                    "skills_required": ["implementation"]
-                },
-                {
-                    "title": "Review and test",
-                    "description": "Validate and test the results",
-                    "estimated_duration": 25,
-                    "priority": "medium",
-                    "skills_required": ["testing", "review"]
-                }
+                {**subtask, "skills_required": list(subtask["skills_required"])}
+                for subtask in FALLBACK_SUBTASKS
             ]
 
     async def _enhance_subtasks_with_ml(self, subtasks: List[Dict[str, Any]], user_context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Enhance subtasks with ML predictions"""
         enhanced_subtasks = []
+        user_skills = frozenset(user_context.get("skills", ()))
         
         for subtask in subtasks:
             try:
@@ -828,7 +941,7 @@ class NextGenAIService:
                 predicted_duration = await self._predict_task_duration(subtask, user_context)
                 
                 # Assess difficulty based on user skills
-                difficulty_score = await self._assess_task_difficulty(subtask, user_context)
+                difficulty_score = await self._assess_task_difficulty(subtask, user_context, user_skills)
                 
                 # Add ML enhancements
                 enhanced_subtask = {
@@ -846,7 +959,7 @@ class NextGenAIService:
                 enhanced_subtasks.append(enhanced_subtask)
                 
             except Exception as e:
-                logger.warning(f"Failed to enhance subtask: {str(e)}")
+                logger.warning("Failed to enhance subtask", error=str(e))
                 enhanced_subtasks.append(subtask)
         
         return enhanced_subtasks
@@ -859,11 +972,10 @@ class NextGenAIService:
         experience_multiplier = user_context.get("experience_level", 1.0)
         
         # Adjust based on task complexity
-        complexity_words = ["complex", "advanced", "difficult", "challenging"]
         description = subtask.get("description", "").lower()
         complexity_adjustment = 1.0
         
-        for word in complexity_words:
+        for word in DURATION_COMPLEXITY_WORDS:
             if word in description:
                 complexity_adjustment += 0.2
         
@@ -874,28 +986,26 @@ class NextGenAIService:
         
         return max(15, min(120, predicted_duration))
 
-    async def _assess_task_difficulty(self, subtask: Dict[str, Any], user_context: Dict[str, Any]) -> float:
+    async def _assess_task_difficulty(self, subtask: Dict[str, Any], user_context: Dict[str, Any],
+                                      user_skills: Optional[frozenset] = None) -> float:
         """Assess task difficulty for the specific user"""
         base_difficulty = 0.5
         
         # Check if user has required skills
         required_skills = subtask.get("skills_required", [])
-        user_skills = user_context.get("skills", [])
+        if user_skills is None:
+            user_skills = frozenset(user_context.get("skills", ()))
         
         skill_match_ratio = 0.8  # Default if no skills specified
         if required_skills:
-            matched_skills = len([skill for skill in required_skills if skill in user_skills])
+            matched_skills = sum(1 for skill in required_skills if skill in user_skills)
             skill_match_ratio = matched_skills / len(required_skills)
         
         # Higher difficulty if user lacks required skills
         difficulty = base_difficulty + (1 - skill_match_ratio) * 0.3
         
         # Adjust based on task priority
-        priority = subtask.get("priority", "medium")
-        if priority == "high":
-            difficulty += 0.1
-        elif priority == "low":
-            difficulty -= 0.1
+        difficulty += PRIORITY_DIFFICULTY_ADJUSTMENT.get(subtask.get("priority", "medium"), 0.0)
         
         return max(0.1, min(1.0, difficulty))
 
@@ -921,13 +1031,17 @@ class NextGenAIService:
         """Analyze dependencies between subtasks"""
         dependencies = []
         
+        # Lowercase each subtask's text and classify it once, not per pair
+        texts = [
+            subtask.get("title", "").lower() + subtask.get("description", "").lower()
+            for subtask in subtasks
+        ]
+        is_verification = [any(word in text for word in VERIFICATION_WORDS) for text in texts]
+        
         # Simple heuristic-based dependency detection
-        for i, subtask in enumerate(subtasks):
-            title = subtask.get("title", "").lower()
-            description = subtask.get("description", "").lower()
-            
+        for i, text in enumerate(texts):
             # Planning tasks usually come first
-            if any(word in title + description for word in ["plan", "research", "analyze", "design"]):
+            if any(word in text for word in PLANNING_WORDS):
                 if i > 0:
                     dependencies.append({
                         "from_task": 0,
@@ -937,10 +1051,9 @@ class NextGenAIService:
                     })
             
             # Testing/review tasks usually come last
-            if any(word in title + description for word in ["test", "review", "validate", "check"]):
+            if is_verification[i]:
                 for j in range(i):
-                    if not any(word in subtasks[j].get("title", "").lower() + subtasks[j].get("description", "").lower() 
-                             for word in ["test", "review", "validate", "check"]):
+                    if not is_verification[j]:
                         dependencies.append({
                             "from_task": j,
                             "to_task": i,
@@ -964,19 +1077,19 @@ class NextGenAIService:
         text = task_description.lower()
         
         # Time overrun risk
-        if any(word in text for word in ["urgent", "asap", "quickly", "fast"]):
+        if any(word in text for word in TIME_PRESSURE_WORDS):
             risks["time_overrun"] += 0.2
         
         # Complexity risk
-        if any(word in text for word in ["complex", "advanced", "new", "unfamiliar"]):
+        if any(word in text for word in UNFAMILIARITY_WORDS):
             risks["complexity_underestimation"] += 0.3
         
         # Dependency risk
-        if any(word in text for word in ["integrate", "connect", "coordinate", "collaborate"]):
+        if any(word in text for word in COORDINATION_WORDS):
             risks["dependency_issues"] += 0.2
         
         # Scope creep risk
-        if any(word in text for word in ["improve", "enhance", "optimize", "also", "additionally"]):
+        if any(word in text for word in SCOPE_EXPANSION_WORDS):
             risks["scope_creep"] += 0.2
         
         # Calculate overall risk score
@@ -1028,31 +1141,26 @@ class NextGenAIService:
     
     def _session_to_dict(self, session) -> Dict[str, Any]:
         """Convert PomodoroSession to dictionary"""
+        completed_at = getattr(session, 'completed_at', None)
         return {
             "id": session.id,
             "duration": getattr(session, 'duration', 25),
             "focus_score": getattr(session, 'focus_score', 0.8),
             "interrupted": getattr(session, 'interrupted', False),
-            "completed_at": getattr(session, 'completed_at', datetime.now()).isoformat()
+            "completed_at": completed_at.isoformat() if completed_at else None
         }
     
     def _task_to_dict(self, task) -> Dict[str, Any]:
-        """Convert Task to dictionary"""
-        return {
-            "id": task.id,
-            "title": getattr(task, 'title', ''),
-            "status": getattr(task, 'status', 'pending'),
-            "priority": getattr(task, 'priority', 'medium'),
-            "completed_pomodoros": getattr(task, 'completed_pomodoros', 0),
-            "estimated_pomodoros": getattr(task, 'estimated_pomodoros', 1)
-        }
+        """Convert Task (or a projected task row) to dictionary"""
+        return dict(zip(TASK_DICT_FIELDS, _get_task_fields(task)))
     
     def _time_entry_to_dict(self, entry) -> Dict[str, Any]:
         """Convert TimeEntry to dictionary"""
+        created_at = getattr(entry, 'created_at', None)
         return {
             "id": entry.id,
             "duration": getattr(entry, 'duration', 25),
-            "created_at": getattr(entry, 'created_at', datetime.now()).isoformat()
+            "created_at": created_at.isoformat() if created_at else None
         }
     
     def _analytics_to_dict(self, analytics) -> Dict[str, Any]:
@@ -1067,12 +1175,7 @@ class NextGenAIService:
 
     async def _optimize_user_schedule(self, user_id: str, predictions: Dict[str, Any]) -> Dict[str, Any]:
         """Generate optimal schedule for user"""
-        return {
-            "recommended_start_time": "09:00",
-            "peak_focus_periods": ["09:00-11:00", "14:00-16:00"],
-            "suggested_break_intervals": 25,
-            "optimal_task_sequence": "high_priority_first"
-        }
+        return {**DEFAULT_SCHEDULE, "peak_focus_periods": list(DEFAULT_SCHEDULE["peak_focus_periods"])}
 
     async def _assess_productivity_risks(self, user_data: Dict[str, Any], predictions: Dict[str, Any]) -> List[str]:
         """Assess productivity risk factors"""
@@ -1104,18 +1207,98 @@ class NextGenAIService:
             return PredictionConfidence.LOW
 
     async def _get_from_cache(self, key: str) -> Optional[Dict[str, Any]]:
-        """Get result from cache"""
+        """Get result from cache, checking the in-process LRU before Redis"""
+        entry = self.response_cache.get(key)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > time.monotonic():
+                self.response_cache.move_to_end(key)
+                # Decode per hit so callers never share (and mutate) the cached objects
+                return orjson.loads(payload)
+            del self.response_cache[key]
+        
+        if not self._cache_available():
+            return None
+        
         try:
-            cached = await self.redis.get(key)
+            # Fetch the value and its remaining lifetime in one round trip
+            pipe = self.redis.pipeline(transaction=False)
+            cached, remaining_ms = await pipe.get(key).pttl(key).execute()
+            self._record_cache_success()
             if cached:
-                return json.loads(cached)
+                # Never keep the local copy past the key's Redis expiry (-1: no expiry)
+                if remaining_ms == -1:
+                    self._store_local(key, cached, self.local_cache_ttl)
+                elif remaining_ms > 0:
+                    self._store_local(key, cached, remaining_ms / 1000)
+                return orjson.loads(cached)
         except Exception as e:
-            logger.warning(f"Cache read failed: {str(e)}")
+            self._record_cache_failure("read", e)
         return None
+    
+    def _store_local(self, key: str, payload: bytes, ttl: float):
+        """Remember an encoded cache entry locally, evicting the least recently used"""
+        self.response_cache[key] = (time.monotonic() + min(ttl, self.local_cache_ttl), payload)
+        self.response_cache.move_to_end(key)
+        if len(self.response_cache) > self.response_cache_size:
+            self.response_cache.popitem(last=False)
 
-    async def _cache_result(self, key: str, result: Dict[str, Any]):
-        """Cache result with TTL"""
+    def _cache_result(self, key: str, result: Any, ttl: Optional[int] = None):
+        """Cache result with TTL (defaults to cache_ttl) without blocking the caller"""
+        # Encode now so later changes to result can't leak into the cached copy
         try:
-            await self.redis.setex(key, self.cache_ttl, json.dumps(result, default=str))
+            payload = orjson.dumps(result, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError as e:
+            logger.warning("Cache write failed", error=str(e))
+            return
+        
+        ttl = ttl or self.cache_ttl
+        # Serve this worker's own fresh result locally; other workers read it from Redis
+        self._store_local(key, payload, ttl)
+        if not self._cache_available():
+            return
+        
+        task = asyncio.create_task(self._write_cache(key, payload, ttl))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    async def _write_cache(self, key: str, payload: bytes, ttl: int):
+        """Write an encoded payload to Redis"""
+        try:
+            await self.redis.setex(key, ttl, payload)
+            self._record_cache_success()
         except Exception as e:
-            logger.warning(f"Cache write failed: {str(e)}")
\ No newline at end of file
+            self._record_cache_failure("write", e)
+    
+    def _cache_available(self) -> bool:
+        """False while Redis is bypassed; once the cool-down ends, lets a single probe through"""
+        if not self._cache_circuit_open:
+            return True
+        now = time.monotonic()
+        if now < self._cache_bypass_until:
+            return False
+        # Half-open: this caller probes Redis while everyone else keeps bypassing it
+        self._cache_bypass_until = now + self.cache_retry_after
+        return True
+    
+    def _record_cache_success(self):
+        """Reset the failure count and close the circuit if a probe succeeded"""
+        self._cache_failures = 0
+        if self._cache_circuit_open:
+            self._cache_circuit_open = False
+            logger.info("Cache circuit closed, using Redis again")
+    
+    def _record_cache_failure(self, operation: str, error: Exception):
+        """Count a Redis failure and open the circuit once the threshold is hit"""
+        if self._cache_circuit_open:
+            # Failed probe: stay open for another cool-down
+            self._cache_bypass_until = time.monotonic() + self.cache_retry_after
+            return
+        
+        self._cache_failures += 1
+        if self._cache_failures >= self.cache_failure_threshold:
+            self._cache_failures = 0
+            self._cache_circuit_open = True
+            self._cache_bypass_until = time.monotonic() + self.cache_retry_after
+            logger.warning("Cache circuit opened, bypassing Redis", operation=operation,
+                           retry_after=self.cache_retry_after, error=str(error))
\ No newline at end of file
@@ -31,10 +31,7 @@ async def main():
         await ai_service.initialize()
         print("✅ AI Service initialized successfully!")
         
-        # Example 1: Productivity Prediction
-        print("\n📊 Example 1: Advanced Productivity Prediction")
-        print("-" * 50)
-        
+        # Example inputs
         user_id = "demo_user_123"
         context = {
             "sleep_hours": 7.5,
@@ -45,22 +42,6 @@ async def main():
             "calendar_density": 0.6
         }
         
-        prediction = await ai_service.advanced_productivity_prediction(user_id, context)
-        
-        print(f"Predicted Productivity Score: {prediction.predicted_score:.2f}")
-        print(f"Confidence Level: {prediction.confidence.value}")
-        print(f"Top Factors:")
-        for factor, importance in list(prediction.factors.items())[:3]:
-            print(f"  - {factor}: {importance:.2f}")
-        
-        print(f"\nRecommendations:")
-        for rec in prediction.recommendations[:3]:
-            print(f"  • {rec}")
-        
-        # Example 2: Intelligent Task Breakdown
-        print("\n🎯 Example 2: Intelligent Task Breakdown")
-        print("-" * 50)
-        
         task_description = """
         Develop a comprehensive machine learning model for predicting user productivity
         patterns in the FocusFlow application. The model should analyze historical data,
@@ -74,28 +55,61 @@ async def main():
             "duration_accuracy": 1.2,  # Historical multiplier
         }
         
-        breakdown = await ai_service.intelligent_task_breakdown(task_description.strip(), user_context)
+        # The two examples are independent, so run them concurrently; a failure
+        # in one is reported below without hiding the other's output
+        prediction, breakdown = await asyncio.gather(
+            ai_service.advanced_productivity_prediction(user_id, context),
+            ai_service.intelligent_task_breakdown(task_description.strip(), user_context),
+            return_exceptions=True
+        )
+        
+        # Example 1: Productivity Prediction
+        print("\n📊 Example 1: Advanced Productivity Prediction")
+        print("-" * 50)
+        
+        if isinstance(prediction, Exception):
+            print(f"❌ Productivity prediction failed: {str(prediction)}")
+        else:
+            print(f"Predicted Productivity Score: {prediction.predicted_score:.2f}")
+            print(f"Confidence Level: {prediction.confidence.value}")
+            print(f"Top Factors:")
+            for factor, importance in list(prediction.factors.items())[:3]:
+                print(f"  - {factor}: {importance:.2f}")
+        
+            print(f"\nRecommendations:")
+            for rec in prediction.recommendations[:3]:
+                print(f"  • {rec}")
+        
+        # Example 2: Intelligent Task Breakdown
+        print("\n🎯 Example 2: Intelligent Task Breakdown")
+        print("-" * 50)
+        
+        if isinstance(breakdown, Exception):
+            print(f"❌ Task breakdown failed: {str(breakdown)}")
+        else:
+            print(f"Task Complexity Score: {breakdown.complexity_score:.2f}")
+            print(f"Estimated Total Duration: {breakdown.estimated_total_duration} minutes")
+            print(f"Recommended Approach: {breakdown.recommended_approach}")
         
-        print(f"Task Complexity Score: {breakdown.complexity_score:.2f}")
-        print(f"Estimated Total Duration: {breakdown.estimated_total_duration} minutes")
-        print(f"Recommended Approach: {breakdown.recommended_approach}")
+            print(f"\nSubtasks ({len(breakdown.subtasks)}):")
+            for i, subtask in enumerate(breakdown.subtasks, 1):
+                print(f"  {i}. {subtask['title']}")
+                print(f"     Duration: {subtask.get('estimated_duration', 'N/A')} min")
+                print(f"     Priority: {subtask.get('priority', 'N/A')}")
+                if 'difficulty_score' in subtask:
+                    print(f"     Difficulty: {subtask['difficulty_score']:.2f}")
+                print()
         
-        print(f"\nSubtasks ({len(breakdown.subtasks)}):")
-        for i, subtask in enumerate(breakdown.subtasks, 1):
-            print(f"  {i}. {subtask['title']}")
-            print(f"     Duration: {subtask.get('estimated_duration', 'N/A')} min")
-            print(f"     Priority: {subtask.get('priority', 'N/A')}")
-            if 'difficulty_score' in subtask:
-                print(f"     Difficulty: {subtask['difficulty_score']:.2f}")
-            print()
+            print(f"Risk Assessment:")
+            risk_assessment = breakdown.risk_assessment
+            print(f"  Overall Risk Score: {risk_assessment.get('overall_risk_score', 0):.2f}")
+            if 'mitigation_strategies' in risk_assessment:
+                print(f"  Mitigation Strategies:")
+                for strategy in risk_assessment['mitigation_strategies'][:2]:
+                    print(f"    • {strategy}")
         
-        print(f"Risk Assessment:")
-        risk_assessment = breakdown.risk_assessment
-        print(f"  Overall Risk Score: {risk_assessment.get('overall_risk_score', 0):.2f}")
-        if 'mitigation_strategies' in risk_assessment:
-            print(f"  Mitigation Strategies:")
-            for strategy in risk_assessment['mitigation_strategies'][:2]:
-                print(f"    • {strategy}")
+        if isinstance(prediction, Exception) or isinstance(breakdown, Exception):
+            raise RuntimeError("one or more examples failed")
         
         print("\n🎉 Demo completed successfully!")
         print("\nThe Next-Generation AI Service provides:")
@@ -6,10 +6,17 @@ Tests the code structure without requiring ML dependencies
 
 import sys
 import os
+from functools import lru_cache
 
 # Add the project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+@lru_cache(maxsize=None)
+def read_file(file_path):
+    """Read a file once per run; several checks inspect the same files"""
+    with open(file_path, 'r') as f:
+        return f.read()
+
 def test_file_structure():
     """Test that all required files exist"""
     required_files = [
@@ -49,11 +56,9 @@ def test_file_content():
     
     for file_path, expected_content in tests:
         try:
-            with open(file_path, 'r') as f:
-                content = f.read()
-                if expected_content not in content:
-                    print(f"❌ {file_path} missing expected content: {expected_content}")
-                    return False
+            if expected_content not in read_file(file_path):
+                print(f"❌ {file_path} missing expected content: {expected_content}")
+                return False
         except FileNotFoundError:
             print(f"❌ File not found: {file_path}")
             return False
@@ -73,9 +78,7 @@ def test_python_syntax():
     
     for file_path in python_files:
         try:
-            with open(file_path, 'r') as f:
-                content = f.read()
-                compile(content, file_path, 'exec')
+            compile(read_file(file_path), file_path, 'exec')
         except SyntaxError as e:
             print(f"❌ Syntax error in {file_path}: {e}")
             return False
@@ -124,8 +127,7 @@ def check_code_completeness():
     """Check that the AI service implementation is complete"""
     ai_service_path = "backend/app/services/next_gen_ai_service.py"
     
-    with open(ai_service_path, 'r') as f:
-        content = f.read()
+    content = read_file(ai_service_path)
     
     required_classes = [
         "class NextGenAIService",